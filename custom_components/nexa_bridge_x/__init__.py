@@ -8,10 +8,16 @@ License: MIT
 from __future__ import annotations
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from .nexa import NexaPlatform
-from .const import DOMAIN
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+from .nexa import NexaPlatform, normalize_node_id
+from .const import DOMAIN, STORAGE_VERSION, SERVICE_REFRESH_NODE
 import logging
+import time
+import voluptuous as vol
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
@@ -24,21 +30,97 @@ PLATFORMS: list[Platform] = [
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+REFRESH_NODE_SCHEMA = vol.Schema({
+    vol.Required("node_id"): vol.All(cv.ensure_list, [cv.string]),
+})
+
+
+async def async_refresh_node(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Refresh specific nodes on the bridges that have them"""
+    node_ids = set(normalize_node_id(n) for n in call.data["node_id"])
+    found = set()
+    refreshed = set()
+
+    for platform in list(hass.data[DOMAIN].values()):
+        coordinator = platform.coordinator
+        if not coordinator.data:
+            continue
+
+        ids = [n for n in node_ids if coordinator.get_node_by_id(n)]
+        if ids:
+            found.update(ids)
+            result = await coordinator.async_refresh_nodes(ids)
+            refreshed.update(normalize_node_id(n) for n in result)
+
+    if missing := node_ids - found:
+        raise ServiceValidationError(
+            f"Unknown node: {', '.join(sorted(missing))}"
+        )
+
+    if failed := found - refreshed:
+        raise HomeAssistantError(
+            f"Failed to refresh node: {', '.join(sorted(failed))}"
+        )
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up HA integration"""
+    hass.data.setdefault(DOMAIN, {})
+
+    async def handle_refresh_node(call: ServiceCall) -> None:
+        await async_refresh_node(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH_NODE,
+        handle_refresh_node,
+        schema=REFRESH_NODE_SCHEMA
+    )
+
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up HA integration entry"""
     hass.data.setdefault(DOMAIN, {})
 
+    start = time.monotonic()
     platform = NexaPlatform(hass, entry)
     hass.data[DOMAIN][entry.entry_id] = platform
 
-    await platform.init()
+    # Entities are created from the cache right away and the bridge is
+    # revalidated in the background so a slow bridge does not block startup
+    cached = await platform.init_from_cache()
+    if not cached:
+        await platform.init()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if cached:
+        entry.async_create_background_task(
+            hass,
+            platform.revalidate(),
+            f"{DOMAIN}_revalidate_{entry.entry_id}"
+        )
+
+    _LOGGER.debug(
+        "Setup completed in %.2fs (cached: %s)",
+        time.monotonic() - start,
+        cached
+    )
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload HA integration entry when options change"""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload HA integration entry"""
     if unload_ok := await hass.config_entries.async_unload_platforms(
@@ -51,3 +133,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             await platform.destroy()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove HA integration entry data"""
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+    await store.async_remove()
@@ -6,11 +6,12 @@ Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
 License: MIT
 """
 from __future__ import annotations
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 from .const import DOMAIN
 from .entities import NexaBinarySensorEntity
+from .nexa import NexaNode
 
 
 async def async_setup_entry(
@@ -21,16 +22,25 @@ async def async_setup_entry(
     """Set up all detected binary sensors"""
     coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
 
-    found_sensors = filter(
-        lambda node: node.is_binary_sensor(),
-        coordinator.data.nodes
-    )
+    @callback
+    def add_entities(nodes: list[NexaNode]) -> None:
+        found_sensors = filter(
+            lambda node: node.is_binary_sensor(),
+            nodes
+        )
 
-    entities = (
-        NexaBinarySensorEntity(coordinator, node, name)
-        for node in found_sensors
-        for name in node.get_binary_capabilities()
-    )
+        entities = [
+            NexaBinarySensorEntity(coordinator, node, name)
+            for node in found_sensors
+            for name in node.get_binary_capabilities()
+        ]
+
+        entities = coordinator.claim_entities(entities)
+        if entities:
+            async_add_entities(entities)
 
-    if entities:
-        async_add_entities(entities)
+    add_entities(coordinator.data.nodes)
+
+    entry.async_on_unload(
+        coordinator.async_add_topology_listener(add_entities)
+    )
@@ -6,11 +6,12 @@ Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
 License: MIT
 """
 from __future__ import annotations
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 from .const import DOMAIN
 from .entities import NexaMotorButtonEntity
+from .nexa import NexaNode
 
 COMMANDS = (
     {"command": "up", "label": "Up", "icon": "mdi:arrow-up"},
@@ -26,18 +27,28 @@ async def async_setup_entry(
 ) -> None:
     """Set up all detected buttons"""
     coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
-    entities = (
-        NexaMotorButtonEntity(
-            coordinator,
-            node,
-            cmd["label"],
-            cmd["command"],
-            cmd["icon"]
-        )
-        for cmd in COMMANDS
-        for node in coordinator.data.nodes
-        if node.is_motor()
-    )
 
-    if entities:
-        async_add_entities(entities)
+    @callback
+    def add_entities(nodes: list[NexaNode]) -> None:
+        entities = [
+            NexaMotorButtonEntity(
+                coordinator,
+                node,
+                cmd["label"],
+                cmd["command"],
+                cmd["icon"]
+            )
+            for cmd in COMMANDS
+            for node in nodes
+            if node.is_motor()
+        ]
+
+        entities = coordinator.claim_entities(entities)
+        if entities:
+            async_add_entities(entities)
+
+    add_entities(coordinator.data.nodes)
+
+    entry.async_on_unload(
+        coordinator.async_add_topology_listener(add_entities)
+    )
@@ -13,16 +13,17 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant.components import zeroconf
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .nexa import NexaApi
+from .nexa import NexaApi, get_sensor_throttle
 from .const import (
     DOMAIN,
     DEFAULT_USERNAME,
     DEFAULT_PASSWORD,
+    THROTTLED_CAPABILITIES,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -37,6 +38,20 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
+def options_schema(options: dict[str, Any]) -> vol.Schema:
+    """Creates the options schema with current values as defaults"""
+    schema = {}
+    positive = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+    for key in THROTTLED_CAPABILITIES:
+        deadband, percent, interval = get_sensor_throttle(options, key)
+        schema[vol.Required(f"{key}_deadband", default=deadband)] = positive
+        schema[vol.Required(f"{key}_deadband_percent", default=percent)] = positive
+        schema[vol.Required(f"{key}_min_interval", default=interval)] = positive
+
+    return vol.Schema(schema)
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
@@ -57,6 +72,12 @@ class NexaBridgeXFlowHandler(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return NexaBridgeXOptionsFlowHandler(config_entry)
+
     _discovered_name: str | None = None
     _discovered_host: str | None = None
     _discovered_username: str | None = None
@@ -164,6 +185,26 @@ class NexaBridgeXFlowHandler(ConfigFlow, domain=DOMAIN):
         )
 
 
+class NexaBridgeXOptionsFlowHandler(OptionsFlow):
+    """Handle options for Nexa Bridge X."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(
+        self,
+        user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage sensor throttling options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=options_schema(dict(self._entry.options))
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -22,21 +22,103 @@ from homeassistant.const import (
 # HomeAssitant Integration unique identifier
 DOMAIN = "nexa_bridge_x"
 
+# Version of the stored topology cache
+STORAGE_VERSION = 1
+
+# How long to wait before writing changes to the topology cache
+CACHE_SAVE_DELAY = 300
+
+# Service for refreshing specific nodes
+SERVICE_REFRESH_NODE = "refresh_node"
+
 # How often to poll the bridge for updates
 POLL_INTERVAL = 60
 
+# How often to poll the bridge when the websocket is healthy
+POLL_INTERVAL_HEALTHY = 300
+
+# How often to poll the bridge when the websocket is down
+POLL_INTERVAL_DEGRADED = 30
+
+# Maximum random delay added to a poll so bridges do not poll in lockstep
+POLL_JITTER = 10
+
+# How often to refresh bridge information
+INFO_POLL_INTERVAL = 3600
+
+# How often to refresh energy statistics
+ENERGY_POLL_INTERVAL = 60
+
+# How long the websocket can be silent before polling is tightened
+WS_SILENCE_THRESHOLD = 600
+
 # How long to wait for a poll request to respond
 POLL_TIMEOUT = 60
 
+# How many times to retry a failed endpoint within a poll
+POLL_RETRIES = 1
+
+# How long to wait before retrying a failed endpoint within a poll
+POLL_RETRY_DELAY = 2
+
 # How long to wait for a call to the bridge to respond
 CALL_TIMEOUT = 30
 
+# How long to show a commanded value before the bridge has to confirm it
+OPTIMISTIC_TIMEOUT = 5
+
 # How long to wait for the initial poll request
 DISCOVERY_TIMEOUT = 120
 
-# How long for a websocket to reconnect after failure
+# How long for a websocket to reconnect after failure.
+# This is doubled for every failed attempt up to the maximum.
 RECONNECT_SLEEP = 5
 
+# Maximum time for a websocket to reconnect after failure
+RECONNECT_MAX_SLEEP = 300
+
+# How long a websocket has to stay connected before the reconnect
+# time goes back to the start
+RECONNECT_STABLE_TIME = 60
+
+# How often to ping the websocket to detect dead connections
+WS_HEARTBEAT = 30
+
+# Maximum number of websocket messages waiting to be applied
+WS_QUEUE_SIZE = 1000
+
+# Apply websocket messages received within this many seconds together.
+# Zero batches everything received within one event loop iteration, which
+# adds no delay but writes each entity once when frames arrive in bursts.
+# None applies every message as soon as it arrives.
+WS_BATCH_WINDOW = 0
+
+# Capabilities that are events and should never be coalesced
+WS_NO_COALESCE = (
+    "customEvent",
+    "notificationPushButton",
+    "notificationButton",
+)
+
+# Maximum number of requests sent to a bridge at the same time.
+# The bridge handles requests one by one, so more only adds queueing there.
+# The connection pool is sized to match.
+REQUEST_CONCURRENCY = 2
+
+# How long an idle connection to a bridge is kept open.
+# The embedded bridge HTTP server drops idle connections quickly, so this
+# is kept short to avoid reusing sockets the bridge already closed.
+POOL_KEEPALIVE_EXPIRY = 10
+
+# How long a request waits before it is moved up one priority class
+REQUEST_AGING = 5
+
+# How long responses are reused for each endpoint.
+# Endpoints that are not listed are never cached.
+REQUEST_CACHE_TTL = {
+    "info": 300,
+}
+
 # Nexa API username
 DEFAULT_USERNAME = "nexa"
 
@@ -53,6 +135,13 @@ HTTP_BASIC_AUTH = False
 # This will always be true for legacy devices
 FORCE_NODE_ENUM = False
 
+# How many nodes to enumerate concurrently.
+# Kept low to not flood the bridge CPU
+NODE_ENUM_CONCURRENCY = 4
+
+# How many polls in a row a node has to be missing before it is removed
+NODE_REMOVE_AFTER = 2
+
 # Force always polling on legacy devices
 FORCE_NODE_POLL = False
 
@@ -87,6 +176,9 @@ NODE_SENSOR_CAPABILITIES = [
     "motor"
 ]
 
+# Listener id used for energy statistics updates
+ENERGY_NODE_ID = "__energy__"
+
 ENERGY_ATTRS = [
     "total_kilowatt_hours",
     "current_wattage",
@@ -152,19 +244,28 @@ SENSOR_MAP = {
         "name": "Wattage",
         "unit": UnitOfPower.WATT,
         "device": SensorDeviceClass.POWER,
-        "class": SensorStateClass.MEASUREMENT
+        "class": SensorStateClass.MEASUREMENT,
+        "deadband": 1.0,
+        "deadband_percent": 0.0,
+        "min_interval": 5
     },
     "electric_voltage": {
         "name": "Voltage",
         "unit": UnitOfElectricPotential.VOLT,
         "device": SensorDeviceClass.VOLTAGE,
-        "class": SensorStateClass.MEASUREMENT
+        "class": SensorStateClass.MEASUREMENT,
+        "deadband": 1.0,
+        "deadband_percent": 0.0,
+        "min_interval": 30
     },
     "electric_ampere": {
         "name": "Amperage",
         "unit": UnitOfElectricCurrent.AMPERE,
         "device": SensorDeviceClass.CURRENT,
-        "class": SensorStateClass.MEASUREMENT
+        "class": SensorStateClass.MEASUREMENT,
+        "deadband": 0.05,
+        "deadband_percent": 0.0,
+        "min_interval": 5
     },
     "temperature": {
         "name": "Temperature",
@@ -205,6 +306,12 @@ SENSOR_MAP = {
     }
 }
 
+# Sensors that can be throttled with deadbands and publish intervals
+THROTTLED_CAPABILITIES = [
+    key for key, value in SENSOR_MAP.items()
+    if "min_interval" in value
+]
+
 ENERGY_MAP = {
     "total_kilowatt_hours": {
         "name": "Total kWh",
@@ -0,0 +1,38 @@
+"""
+Home Assistant - Nexa Bridge X Integration
+
+Author: Anders Evenrud <andersevenrud@gmail.com>
+Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
+License: MIT
+"""
+from __future__ import annotations
+from typing import Any
+import time
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry
+) -> dict[str, Any]:
+    """Get diagnostics for a config entry"""
+    platform = hass.data[DOMAIN][entry.entry_id]
+    now = time.monotonic()
+
+    return {
+        "api": dict(platform.api.stats),
+        "api_scheduler": {
+            name: dict(stats)
+            for name, stats in platform.api.scheduler.stats.items()
+        },
+        "websocket": dict(platform.ws.stats),
+        "websocket_queue": dict(platform.ws.queue.stats),
+        "websocket_early": dict(platform.coordinator.early_messages.stats),
+        "coordinator": dict(platform.coordinator.stats),
+        "endpoints": {
+            name: endpoint.as_dict(now)
+            for name, endpoint in platform.coordinator.endpoints.items()
+        },
+    }
@@ -6,7 +6,7 @@ Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
 License: MIT
 """
 from __future__ import annotations
-from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.components.binary_sensor import BinarySensorEntity
@@ -19,6 +19,7 @@ from homeassistant.components.media_player import (
 )
 from homeassistant.components.button import ButtonEntity
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
@@ -29,9 +30,17 @@ from homeassistant.components.light import (
     ColorMode,
     ATTR_BRIGHTNESS
 )
-from .const import (DOMAIN, SENSOR_MAP, ENERGY_MAP, BINARY_MAP)
-from .nexa import (NexaNode, NexaNodeValueType)
+from .const import (
+    DOMAIN,
+    SENSOR_MAP,
+    ENERGY_MAP,
+    BINARY_MAP,
+    ENERGY_NODE_ID,
+    NODE_MEDIA_CAPABILITIES
+)
+from .nexa import (NexaNode, NexaNodeValueType, get_sensor_throttle)
 import logging
+import time
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,6 +49,7 @@ class NexaEntity(CoordinatorEntity):
     """Representation of a Nexa Bridge entity"""
 
     _attr_has_entity_name = True
+    _last_written_state: tuple | None = None
 
     def __init__(self, coordinator: CoordinatorEntity) -> None:
         super().__init__(coordinator)
@@ -58,12 +68,46 @@ class NexaEntity(CoordinatorEntity):
             )
         )
 
+    @property
+    def available(self) -> bool:
+        """Values restored from the cache are not shown until confirmed"""
+        return super().available and not self.coordinator.restored
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Allow the entity to be added again"""
+        await super().async_will_remove_from_hass()
+        self.coordinator.release_entity(self)
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write state only if it differs from the last written state"""
+        state = (
+            self.available,
+            self.state,
+            self.capability_attributes,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+        stats = self.coordinator.stats
+
+        if state == self._last_written_state:
+            stats["suppressed_writes"] += 1
+            return
+
+        stats["writes"] += 1
+        self._last_written_state = state
+        self.async_write_ha_state()
+
 
 class NexaNodeEntity(NexaEntity):
     """Representation of a Nexa Device entity"""
 
     _attr_has_entity_name = True
 
+    # Capabilities that trigger updates from websocket events.
+    # None listens to the entire node.
+    _listen_capabilities: tuple[str, ...] | None = None
+
     def __init__(self, node: NexaNode, coordinator: CoordinatorEntity) -> None:
         super().__init__(coordinator)
 
@@ -75,11 +119,30 @@ class NexaNodeEntity(NexaEntity):
             }
         )
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to targeted node updates"""
+        await super().async_added_to_hass()
+
+        caps = self._listen_capabilities
+        for cap in (None,) if caps is None else caps:
+            self.async_on_remove(
+                self.coordinator.async_add_node_listener(
+                    self.id,
+                    cap,
+                    self._handle_coordinator_update
+                )
+            )
+
 
 class NexaDimmerEntity(NexaNodeEntity, LightEntity):
     """Entity for light"""
     _attr_color_mode = ColorMode.BRIGHTNESS
     _attr_supported_color_modes = {ColorMode.BRIGHTNESS}
+    _listen_capabilities = ("switchLevel",)
 
     def __init__(self, coordinator: DataUpdateCoordinator, node: NexaNode):
         _LOGGER.info("Found light %s: %s", node.id, node.name)
@@ -88,6 +151,10 @@ class NexaDimmerEntity(NexaNodeEntity, LightEntity):
         self._attr_name = "Light"
         self._attr_unique_id = f"dimmer_{node.id}"
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return node.is_light()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         node = self.coordinator.get_node_by_id(self.id)
@@ -97,7 +164,7 @@ class NexaDimmerEntity(NexaNodeEntity, LightEntity):
 
             self._attr_is_on = value_percentage > 0
             self._attr_brightness = int(value * 255)
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     async def async_turn_on(self, **kwargs) -> None:
         """Send turn on or light command"""
@@ -113,11 +180,12 @@ class NexaDimmerEntity(NexaNodeEntity, LightEntity):
         await self._api_call(0.0)
 
     async def _api_call(self, value: float):
-        await self.coordinator.api.node_call(self.id, "switchLevel", value)
+        await self.coordinator.async_node_call(self.id, "switchLevel", value)
 
 
 class NexaSwitchEntity(NexaNodeEntity, SwitchEntity):
     """Entity for swtich"""
+    _listen_capabilities = ("switchBinary",)
 
     def __init__(self, coordinator: DataUpdateCoordinator, node: NexaNode):
         _LOGGER.info("Found switch %s: %s", node.id, node.name)
@@ -126,12 +194,16 @@ class NexaSwitchEntity(NexaNodeEntity, SwitchEntity):
         self._attr_name = "Switch"
         self._attr_unique_id = f"switch_{node.id}"
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return node.is_switch()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         node = self.coordinator.get_node_by_id(self.id)
         if node:
             self._attr_is_on = node.get_value("switchBinary")
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     async def async_turn_on(self, **kwargs) -> None:
         """Send turn on command"""
@@ -142,7 +214,7 @@ class NexaSwitchEntity(NexaNodeEntity, SwitchEntity):
         await self._api_call(False)
 
     async def _api_call(self, value: bool):
-        await self.coordinator.api.node_call(self.id, "switchBinary", value)
+        await self.coordinator.async_node_call(self.id, "switchBinary", value)
 
 
 class NexaSensorEntity(NexaNodeEntity, SensorEntity):
@@ -158,6 +230,7 @@ class NexaSensorEntity(NexaNodeEntity, SensorEntity):
         super().__init__(node, coordinator)
         self.id = node.id
         self.key = key
+        self._listen_capabilities = (key,)
         self._attr_native_value = None
         self._attr_name = "Sensor"
         self._attr_unique_id = f"sensor_{node.id}_{key}"
@@ -175,17 +248,95 @@ class NexaSensorEntity(NexaNodeEntity, SensorEntity):
             self._attr_name = f"Last {SENSOR_MAP[key]['name']}"
             self._attr_options = node.custom_events
 
+        (
+            self._deadband,
+            self._deadband_percent,
+            self._min_interval
+        ) = get_sensor_throttle(coordinator.config_entry.options, key)
+        self._published_at: float | None = None
+        self._pending_value: NexaNodeValueType | None = None
+        self._flush_cancel: CALLBACK_TYPE | None = None
+
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return self.key in node.get_sensor_capabilities()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel any pending publish"""
+        await super().async_will_remove_from_hass()
+
+        if self._flush_cancel:
+            self._flush_cancel()
+            self._flush_cancel = None
+
+    def _is_within_deadband(self, value: NexaNodeValueType) -> bool:
+        """If the value is too close to the published value to publish"""
+        current = self._attr_native_value
+        numeric = (int, float)
+
+        if not isinstance(value, numeric) or isinstance(value, bool):
+            return False
+        if not isinstance(current, numeric) or isinstance(current, bool):
+            return False
+
+        delta = abs(value - current)
+        if self._deadband and delta <= self._deadband:
+            return True
+        if self._deadband_percent and current:
+            return delta / abs(current) * 100 <= self._deadband_percent
+
+        return False
+
+    @callback
+    def _publish(self, value: NexaNodeValueType) -> None:
+        """Publish a new value"""
+        if self._flush_cancel:
+            self._flush_cancel()
+            self._flush_cancel = None
+
+        self._attr_native_value = value
+        self._published_at = time.monotonic()
+        self.async_write_ha_state_if_changed()
+
+    @callback
+    def _flush(self, _now) -> None:
+        """Publish the latest value when the interval ends"""
+        self._flush_cancel = None
+        self._publish(self._pending_value)
+
     @callback
     def _handle_coordinator_update(self) -> None:
         node = self.coordinator.get_node_by_id(self.id)
         if node:
             value = node.get_value(self.key)
             if self.key == "switchLevel":
-                self._attr_native_value = int(value * 100)
-            else:
-                self._attr_native_value = value
-
-            self.async_write_ha_state()
+                value = int(value * 100)
+            elif self.key == "customEvent":
+                self._attr_options = node.custom_events
+
+            # A pending flush always publishes the latest value
+            if self._flush_cancel:
+                self._pending_value = value
+                self.async_write_ha_state_if_changed()
+                return
+
+            if self._is_within_deadband(value):
+                self.async_write_ha_state_if_changed()
+                return
+
+            if self._min_interval and self._published_at is not None:
+                elapsed = time.monotonic() - self._published_at
+                if elapsed < self._min_interval:
+                    self._pending_value = value
+                    self._flush_cancel = async_call_later(
+                        self.hass,
+                        self._min_interval - elapsed,
+                        self._flush
+                    )
+                    self.async_write_ha_state_if_changed()
+                    return
+
+            self._publish(value)
 
 
 class NexaBinarySensorEntity(NexaNodeEntity, BinarySensorEntity):
@@ -201,6 +352,7 @@ class NexaBinarySensorEntity(NexaNodeEntity, BinarySensorEntity):
         super().__init__(node, coordinator)
         self.id = node.id
         self.key = key
+        self._listen_capabilities = (key,)
         self._attr_is_on = None
         self._attr_unique_id = f"binary_sensor_{node.id}_{key}"
 
@@ -209,12 +361,16 @@ class NexaBinarySensorEntity(NexaNodeEntity, BinarySensorEntity):
         else:
             self._attr_name = "Binary Sensor"
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return self.key in node.get_binary_capabilities()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         node = self.coordinator.get_node_by_id(self.id)
         if node:
             self._attr_is_on = node.get_value(self.key)
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
 
 class NexaEnergyEntity(NexaEntity, SensorEntity):
@@ -231,13 +387,25 @@ class NexaEnergyEntity(NexaEntity, SensorEntity):
         self._attr_device_class = ENERGY_MAP[attr]["device"]
         self._attr_state_class = ENERGY_MAP[attr]["class"]
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to targeted energy updates"""
+        await super().async_added_to_hass()
+
+        self.async_on_remove(
+            self.coordinator.async_add_node_listener(
+                ENERGY_NODE_ID,
+                self.id,
+                self._handle_coordinator_update
+            )
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
         self._attr_native_value = getattr(
             self.coordinator.data.energy,
             self.id
         )
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
 
 class NexaMediaPlayerEntity(NexaNodeEntity, MediaPlayerEntity):
@@ -248,6 +416,7 @@ class NexaMediaPlayerEntity(NexaNodeEntity, MediaPlayerEntity):
     _attr_is_volume_muted: bool | None = None
     _attr_state: MediaPlayerState | None = None
     _attr_volume_level: float | None = None
+    _listen_capabilities = tuple(NODE_MEDIA_CAPABILITIES)
     _attr_supported_features: MediaPlayerEntityFeature = (
         MediaPlayerEntityFeature.PAUSE
         | MediaPlayerEntityFeature.VOLUME_SET
@@ -267,6 +436,10 @@ class NexaMediaPlayerEntity(NexaNodeEntity, MediaPlayerEntity):
         self._attr_unique_id = f"media_player_{node.id}"
         self._attr_name = node.name or node.id
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return node.is_media_player()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         node = self.coordinator.get_node_by_id(self.id)
@@ -279,7 +452,7 @@ class NexaMediaPlayerEntity(NexaNodeEntity, MediaPlayerEntity):
             self._attr_volume_level = node.get_value("mediaVolume")
             self._attr_is_volume_muted = node.get_value("mediaMute")
 
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     async def async_media_play(self) -> None:
         """Send play command to media player"""
@@ -291,18 +464,24 @@ class NexaMediaPlayerEntity(NexaNodeEntity, MediaPlayerEntity):
 
     async def async_set_volume_level(self, volume: float) -> None:
         """Send volume level to media player"""
-        await self._api_call("mediaVolume", int(volume * 100))
+        await self._api_call("mediaVolume", int(volume * 100), volume)
 
     async def async_mute_volume(self, mute: bool) -> None:
         """Send mute command to media player."""
         await self._api_call("mediaMute", mute)
 
-    async def _api_call(self, cap: str, value: NexaNodeValueType):
-        await self.coordinator.api.node_call(self.id, cap, value)
+    async def _api_call(
+        self,
+        cap: str,
+        value: NexaNodeValueType,
+        predicted: NexaNodeValueType | None = None
+    ):
+        await self.coordinator.async_node_call(self.id, cap, value, predicted)
 
 
 class NexaMotorButtonEntity(NexaNodeEntity, ButtonEntity):
     """Entity for motor control button"""
+    _listen_capabilities = ()
 
     def __init__(
             self,
@@ -320,6 +499,10 @@ class NexaMotorButtonEntity(NexaNodeEntity, ButtonEntity):
         self._attr_icon = icon or "mdi:gesture-tap"
         self._command = command
 
+    def is_supported(self, node: NexaNode) -> bool:
+        """If the node still has the capabilities of this entity"""
+        return node.is_motor()
+
     async def async_press(self) -> None:
         await self._api_call("motor", self._command)
 
@@ -6,11 +6,12 @@ Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
 License: MIT
 """
 from __future__ import annotations
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 from .const import DOMAIN
 from .entities import NexaDimmerEntity
+from .nexa import NexaNode
 
 
 async def async_setup_entry(
@@ -20,11 +21,21 @@ async def async_setup_entry(
 ) -> None:
     """Set up all detected lights"""
     coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
-    entities = (
-        NexaDimmerEntity(coordinator, node)
-        for node in coordinator.data.nodes
-        if node.is_light()
-    )
 
-    if entities:
-        async_add_entities(entities)
+    @callback
+    def add_entities(nodes: list[NexaNode]) -> None:
+        entities = [
+            NexaDimmerEntity(coordinator, node)
+            for node in nodes
+            if node.is_light()
+        ]
+
+        entities = coordinator.claim_entities(entities)
+        if entities:
+            async_add_entities(entities)
+
+    add_entities(coordinator.data.nodes)
+
+    entry.async_on_unload(
+        coordinator.async_add_topology_listener(add_entities)
+    )
@@ -6,30 +6,77 @@ Homepage: https://github.com/andersevenrud/ha-nexa-bridge-x
 License: MIT
 """
 from __future__ import annotations
-from functools import reduce
-from datetime import timedelta
-from typing import cast, Any, Union
+from collections import OrderedDict
+from collections.abc import Hashable
+from contextlib import asynccontextmanager
+from functools import partial, reduce
+from datetime import datetime, timedelta, timezone
+from typing import (
+    cast,
+    Any,
+    Awaitable,
+    AsyncIterator,
+    Callable,
+    Container,
+    Generator,
+    Iterable,
+    Mapping,
+    Union
+)
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.httpx_client import get_async_client
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.json import json_loads
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from .const import (
     DOMAIN,
+    STORAGE_VERSION,
+    CACHE_SAVE_DELAY,
+    SENSOR_MAP,
+    ENERGY_ATTRS,
+    ENERGY_NODE_ID,
     NODE_SENSOR_CAPABILITIES,
     NODE_BINARY_CAPABILITIES,
     NODE_MEDIA_CAPABILITIES,
     POLL_INTERVAL,
+    POLL_INTERVAL_HEALTHY,
+    POLL_INTERVAL_DEGRADED,
+    POLL_JITTER,
+    INFO_POLL_INTERVAL,
+    ENERGY_POLL_INTERVAL,
+    WS_SILENCE_THRESHOLD,
     POLL_TIMEOUT,
+    POLL_RETRIES,
+    POLL_RETRY_DELAY,
     DISCOVERY_TIMEOUT,
     CALL_TIMEOUT,
+    OPTIMISTIC_TIMEOUT,
     RECONNECT_SLEEP,
+    RECONNECT_MAX_SLEEP,
+    RECONNECT_STABLE_TIME,
+    WS_HEARTBEAT,
+    WS_QUEUE_SIZE,
+    WS_NO_COALESCE,
+    WS_BATCH_WINDOW,
+    POOL_KEEPALIVE_EXPIRY,
+    REQUEST_CONCURRENCY,
+    REQUEST_AGING,
+    REQUEST_CACHE_TTL,
     WS_PORT,
     HTTP_BASIC_AUTH,
     FORCE_NODE_ENUM,
+    NODE_REMOVE_AFTER,
+    NODE_ENUM_CONCURRENCY,
     FORCE_NODE_POLL
 )
 import dateutil.parser
@@ -37,6 +84,8 @@ import asyncio
 import aiohttp
 import json
 import logging
+import random
+import time
 import async_timeout
 import httpx
 
@@ -53,35 +102,100 @@ NexaCallData = Any
 NexaWebsocketMessage = str
 NexaWebsocketData = Any
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Request priority classes, lower is served first
+PRIORITY_COMMAND = 0
+PRIORITY_TARGETED = 1
+PRIORITY_BULK = 2
+
+PRIORITY_NAMES = ("command", "targeted", "bulk")
+
+JSON_DECODER = json.JSONDecoder()
+
 
 def is_capable_of(node: NexaNode, items: list(str)) -> bool:
     """Check if given capability is available"""
     return any(cap for cap in items if cap in node.capabilities)
 
 
-def is_newer_date(current: str, new: str) -> bool:
-    """Check if given timestamp is newer to the current"""
-    current_time = dateutil.parser.isoparse(current)
-    new_time = dateutil.parser.isoparse(new)
-    return new_time > current_time
+def normalize_node_id(node_id: str | int) -> str:
+    """Normalizes a node id so websocket and api ids can be compared"""
+    return str(node_id)
+
+
+def parse_timestamp(value: str) -> int:
+    """Parses a timestamp into microseconds since epoch"""
+    try:
+        # The bridge always sends ISO-8601 which the native parser handles
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = dateutil.parser.isoparse(value)
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    delta = parsed - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def format_timestamp(value: int) -> str:
+    """Formats microseconds since epoch as a timestamp"""
+    return (EPOCH + timedelta(microseconds=value)).isoformat()
+
 
+def get_sensor_throttle(
+    options: Mapping[str, Any],
+    key: str
+) -> tuple[float, float, float]:
+    """Get deadband, deadband percentage and minimum publish interval"""
+    defaults = SENSOR_MAP.get(key, {})
 
-def values_from_events(node: NexaNodeData, legacy: bool) -> list[NexaNodeValue]:
-    """Creates a list of node values based on node data"""
+    return (
+        options.get(f"{key}_deadband", defaults.get("deadband", 0)),
+        options.get(
+            f"{key}_deadband_percent",
+            defaults.get("deadband_percent", 0)
+        ),
+        options.get(f"{key}_min_interval", defaults.get("min_interval", 0)),
+    )
+
+
+def message_key(
+    data: NexaWebsocketData,
+    legacy: bool
+) -> tuple[str, str] | None:
+    """Get the key of the value a websocket message updates"""
+    cap = data.get(legacy and "name" or "capability")
+    node_id = data.get("sourceNode")
+
+    # Events are not states and can not be superseded
+    if cap is None or node_id is None or cap in WS_NO_COALESCE:
+        return None
+
+    return (normalize_node_id(node_id), cap)
+
+
+def values_from_events(
+    node: NexaNodeData,
+    legacy: bool
+) -> dict[str, NexaNodeValue]:
+    """Creates a map of node values based on node data"""
     prev_key = legacy and "value" or "prevValue"
     keys = (prev_key, "value", "time")
     ignores = ("methodCall")
-    values = []
+    values = {}
 
     if "lastEvents" in node:
         for key, data in node["lastEvents"].items():
             if key not in ignores and all(k in data for k in keys):
-                values.append(NexaNodeValue(
+                values[key] = NexaNodeValue(
                     key,
                     data["value"],
                     data[prev_key],
+                    parse_timestamp(data["time"]),
                     data["time"]
-                ))
+                )
 
     return values
 
@@ -106,6 +220,219 @@ class NexaApiNotCompatibleError(NexaApiError):
     """Not a Nexa API error"""
 
 
+class NexaMessageQueue:
+    """Bounded queue that only keeps the latest message for each key"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.items: OrderedDict[Hashable, NexaWebsocketData] = OrderedDict()
+        self.event = asyncio.Event()
+        self.sequence = 0
+        self.stats = {
+            "depth": 0,
+            "max_depth": 0,
+            "coalesced": 0,
+            "dropped": 0,
+        }
+
+    def put(self, key: Hashable | None, item: NexaWebsocketData) -> None:
+        """Add a message, replacing any queued message with the same key"""
+        if key is None:
+            self.sequence += 1
+            key = (None, self.sequence)
+
+        if key in self.items:
+            self.stats["coalesced"] += 1
+        elif len(self.items) >= self.maxsize:
+            self.items.popitem(last=False)
+            self.stats["dropped"] += 1
+
+        # Replacing keeps the position of the first queued message
+        self.items[key] = item
+
+        depth = len(self.items)
+        self.stats["depth"] = depth
+        self.stats["max_depth"] = max(depth, self.stats["max_depth"])
+        self.event.set()
+
+    async def get(self) -> NexaWebsocketData:
+        """Wait for the next message"""
+        while not self.items:
+            self.event.clear()
+            await self.event.wait()
+
+        _key, item = self.items.popitem(last=False)
+        self.stats["depth"] = len(self.items)
+
+        return item
+
+    def drain(self) -> list[NexaWebsocketData]:
+        """Take all queued messages"""
+        items = list(self.items.values())
+        self.items.clear()
+        self.stats["depth"] = 0
+
+        return items
+
+
+class NexaCommand:
+    """Command waiting to be sent to a device"""
+    __slots__ = ("value", "future")
+
+    def __init__(self, value: NexaNodeValueType) -> None:
+        self.value = value
+        self.future = asyncio.get_running_loop().create_future()
+
+    def set_result(self, result: NexaCallData) -> None:
+        """Resolve all callers waiting for this command"""
+        if not self.future.done():
+            self.future.set_result(result)
+
+    def set_exception(self, err: Exception) -> None:
+        """Fail all callers waiting for this command"""
+        if not self.future.done():
+            self.future.set_exception(err)
+
+
+class NexaCommandSlot:
+    """Command in flight and the next one to send for a node capability"""
+    __slots__ = ("task", "pending")
+
+    def __init__(self) -> None:
+        self.task: asyncio.Task | None = None
+        self.pending: NexaCommand | None = None
+
+
+class NexaRequestWaiter:
+    """Request waiting for its turn"""
+    __slots__ = ("priority", "queued", "future")
+
+    def __init__(self, priority: int, queued: float) -> None:
+        self.priority = priority
+        self.queued = queued
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class NexaRequestScheduler:
+    """Limits concurrent requests and serves them by priority"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self.waiters: list[NexaRequestWaiter] = []
+        self.stats = {
+            name: {
+                "requests": 0,
+                "waiting": 0,
+                "waiting_max": 0,
+                "wait_ms": 0,
+                "wait_ms_max": 0,
+            }
+            for name in PRIORITY_NAMES
+        }
+
+    def get_effective_priority(
+        self,
+        waiter: NexaRequestWaiter,
+        now: float
+    ) -> tuple[float, float]:
+        """Get priority of a waiter, raised the longer it has waited"""
+        aged = (now - waiter.queued) // REQUEST_AGING
+        return (waiter.priority - aged, waiter.queued)
+
+    def wake(self) -> None:
+        """Let waiting requests through while there are free slots"""
+        now = time.monotonic()
+        while self.waiters and self.active < self.limit:
+            waiter = min(
+                self.waiters,
+                key=lambda w: self.get_effective_priority(w, now)
+            )
+            self.waiters.remove(waiter)
+            self.stats[PRIORITY_NAMES[waiter.priority]]["waiting"] -= 1
+
+            # A cancelled request is cleaned up by its own task later on
+            if waiter.future.done():
+                continue
+
+            self.active += 1
+            waiter.future.set_result(None)
+
+    def release(self) -> None:
+        """Free a slot"""
+        self.active -= 1
+        self.wake()
+
+    def record(self, priority: int, waited: float) -> None:
+        """Record time spent waiting for a slot"""
+        stats = self.stats[PRIORITY_NAMES[priority]]
+        wait_ms = round(waited * 1000)
+        stats["requests"] += 1
+        stats["wait_ms"] = wait_ms
+        stats["wait_ms_max"] = max(wait_ms, stats["wait_ms_max"])
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        """Wait for a free slot"""
+        queued = time.monotonic()
+
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+        else:
+            waiter = NexaRequestWaiter(priority, queued)
+            self.waiters.append(waiter)
+
+            stats = self.stats[PRIORITY_NAMES[priority]]
+            stats["waiting"] += 1
+            stats["waiting_max"] = max(stats["waiting"], stats["waiting_max"])
+
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                # The slot may have been handed over right before cancelling
+                if not waiter.future.cancelled():
+                    self.release()
+                elif waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                    self.stats[PRIORITY_NAMES[priority]]["waiting"] -= 1
+                raise
+
+        self.record(priority, time.monotonic() - queued)
+
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class NexaAuth(httpx.Auth):
+    """Authentication reused between requests that counts round trips"""
+
+    def __init__(self, auth: httpx.Auth, stats: dict[str, int]) -> None:
+        self.auth = auth
+        self.stats = stats
+
+    def auth_flow(
+        self,
+        request: httpx.Request
+    ) -> Generator[httpx.Request, httpx.Response, None]:
+        """Wraps the authentication flow"""
+        flow = self.auth.auth_flow(request)
+        request = next(flow)
+
+        while True:
+            self.stats["round_trips"] += 1
+            response = yield request
+
+            try:
+                request = flow.send(response)
+            except StopIteration:
+                return
+
+            # Digest auth re-sends the request after a (stale) challenge
+            self.stats["challenges"] += 1
+
+
 class NexaPlatform:
     """Nexa Platform"""
 
@@ -118,28 +445,94 @@ class NexaPlatform:
         if "legacy" in entry.data:
             legacy = entry.data["legacy"]
 
-        self.api = NexaApi(hass, host, username, password, legacy)
-        self.coordinator = NexaCoordinator(hass, self.api, legacy)
+        self.store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self.api = NexaApi(hass, host, username, password, legacy, True)
+        self.coordinator = NexaCoordinator(hass, self.api, legacy, self.store)
         self.ws = NexaWebSocket(hass, host, self.coordinator)
 
     async def destroy(self) -> None:
         """Destroy all running services"""
         await self.ws.destroy()
+        await self.api.close()
+
+    async def test_connection(self) -> None:
+        """Validate the bridge and keep its info for the first refresh"""
+        start = time.monotonic()
+        info = await self.api.test_connection()
+        now = time.monotonic()
+
+        # The info was just fetched, so the first refresh can skip it
+        self.coordinator.endpoints["info"].set_result(info, now)
+        if self.coordinator.data:
+            self.coordinator.data.info = NexaInfo(info)
+
+        _LOGGER.debug("Bridge validated in %.2fs", now - start)
+
+    async def refresh(self, first: bool) -> None:
+        """Run the first refresh while the websocket connects"""
+        start = time.monotonic()
+
+        # Events received before the first data are buffered and replayed
+        # by the coordinator, so the websocket can start right away
+        await self.ws.connect()
+
+        if first:
+            await self.coordinator.async_config_entry_first_refresh()
+        else:
+            await self.coordinator.async_refresh()
+
+        _LOGGER.debug(
+            "First refresh completed in %.2fs",
+            time.monotonic() - start
+        )
 
     async def init(self) -> None:
         """Initialize all services"""
-        await self.api.test_connection()
-        await self.coordinator.async_config_entry_first_refresh()
-        await self.ws.connect()
+        start = time.monotonic()
+
+        try:
+            await self.test_connection()
+            await self.refresh(True)
+        except Exception:
+            await self.destroy()
+            raise
+
+        _LOGGER.debug("Bridge ready in %.2fs", time.monotonic() - start)
+
+    async def init_from_cache(self) -> bool:
+        """Restore the last known topology so entities can be created"""
+        cache = await self.store.async_load()
+        if not cache:
+            return False
+
+        return self.coordinator.restore_cache(cache)
+
+    async def revalidate(self) -> None:
+        """Revalidate cached data with the bridge in the background"""
+        start = time.monotonic()
+
+        try:
+            await self.test_connection()
+        except Exception as err:
+            _LOGGER.warning("Bridge is not available yet: %r", err)
+
+        # Failures are retried by the coordinator on its regular schedule
+        await self.refresh(False)
+
+        _LOGGER.debug(
+            "Bridge revalidated in %.2fs (success: %s)",
+            time.monotonic() - start,
+            self.coordinator.last_update_success
+        )
 
 
 class NexaWebSocket:
     """Nexa Websocket"""
     host: str
     stopping: bool = False
-    task = None
-    ws: aiohttp.ws | None = None
-    session: aiohttp.session | None = None
+    task: asyncio.Task | None = None
+    consumer: asyncio.Task | None = None
+    ws: aiohttp.ClientWebSocketResponse | None = None
 
     def __init__(
         self,
@@ -150,6 +543,21 @@ class NexaWebSocket:
         self.hass = hass
         self.host = host
         self.coordinator = coordinator
+        self.session = async_get_clientsession(hass)
+        self.queue = NexaMessageQueue(WS_QUEUE_SIZE)
+        self.attempts = 0
+        self.connected_at: float | None = None
+        self.stats = {
+            "connects": 0,
+            "disconnects": 0,
+            "failed_connects": 0,
+            "messages": 0,
+            "batches": 0,
+            "frames": 0,
+            "invalid": 0,
+            "ignored": 0,
+            "unknown": 0,
+        }
 
     async def destroy(self) -> None:
         """Stop all running things"""
@@ -158,89 +566,161 @@ class NexaWebSocket:
 
         await self.close()
 
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+        if self.consumer:
+            self.consumer.cancel()
+            self.consumer = None
+
     async def close(self) -> None:
-        """Close the running session"""
+        """Close the running connection"""
         _LOGGER.debug("Closing websocket")
 
         if self.ws:
             await self.ws.close()
             self.ws = None
 
-        if self.session:
-            await self.session.close()
-            self.session = None
-
-        if self.task:
-            self.task.cancel()
-            self.task = None
-
     async def on_message(self, msg: NexaWebsocketMessage) -> None:
         """Handle message from websocket"""
-        if not msg.startswith("{"):
-            msg = msg.split(':', 1)[1]
+        self.stats["frames"] += 1
+        start = msg.find("{")
 
         try:
-            data = json.loads(msg)
-        except Exception as err:
-            _LOGGER.warning("Invalid websocket message (%s): %s", msg, err)
+            if start == 0:
+                data = json_loads(msg)
+            else:
+                # Legacy frames are prefixed with a name, so decode in place
+                # after the prefix instead of copying the payload out
+                data, _end = JSON_DECODER.raw_decode(msg, max(start, 0))
+        except ValueError as err:
+            self.stats["invalid"] += 1
+            _LOGGER.debug("Invalid websocket message (%.100s): %s", msg, err)
             return
 
-        try:
-            await self.coordinator.update_node_from_message(data)
-        except Exception as e:
-            _LOGGER.warning("Failed to handle message: %s - %s", msg, e)
+        coordinator = self.coordinator
+        cap_key = coordinator.legacy and "name" or "capability"
 
-    async def run(self, url) -> None:
-        """Create websocket connection"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                self.session = session
+        if not isinstance(data, dict) or not all(
+            k in data for k in (cap_key, "sourceNode", "value", "time")
+        ):
+            self.stats["ignored"] += 1
+            return
 
-                try:
-                    async with session.ws_connect(url) as ws:
-                        self.ws = ws
-
-                        async for msg in self.ws:
-                            try:
-                                if msg.type in (aiohttp.WSMsgType.CLOSED,
-                                                aiohttp.WSMsgType.ERROR):
-                                    break
-
-                                if msg.data:
-                                    await self.on_message(
-                                        cast(NexaWebsocketMessage, msg.data)
-                                    )
-                            except Exception:
-                                _LOGGER.error("Websocket message error")
+        node_id = data["sourceNode"]
+        if coordinator.data and not coordinator.get_node_by_id(node_id):
+            self.stats["unknown"] += 1
+            return
+
+        self.queue.put(message_key(data, coordinator.legacy), data)
+
+    async def consume(self) -> None:
+        """Apply queued messages to the coordinator"""
+        while True:
+            batch = [await self.queue.get()]
+
+            # Messages arriving within the window are applied together so
+            # that every affected entity is only written once
+            if WS_BATCH_WINDOW is not None:
+                await asyncio.sleep(WS_BATCH_WINDOW)
+                batch.extend(self.queue.drain())
 
+            self.stats["messages"] += len(batch)
+            self.stats["batches"] += 1
+
+            try:
+                await self.coordinator.update_nodes_from_messages(batch)
+            except Exception as e:
+                _LOGGER.warning("Failed to handle messages: %s", e)
+
+    async def run(self, url: str) -> None:
+        """Receive messages until the connection is lost"""
+        # The heartbeat pings the bridge and closes the connection if no
+        # pong is received, so half-open sockets are detected in seconds
+        async with self.session.ws_connect(
+            url,
+            heartbeat=WS_HEARTBEAT
+        ) as ws:
+            self.ws = ws
+            self.connected_at = time.monotonic()
+            self.stats["connects"] += 1
+            self.coordinator.async_set_websocket_state(True)
+
+            async for msg in ws:
+                try:
+                    if msg.type in (aiohttp.WSMsgType.CLOSED,
+                                    aiohttp.WSMsgType.ERROR):
+                        break
+
+                    if msg.data:
+                        await self.on_message(
+                            cast(NexaWebsocketMessage, msg.data)
+                        )
                 except Exception:
-                    _LOGGER.warning("Failed to create websocket connection...")
+                    _LOGGER.error("Websocket message error")
 
-        except Exception:
-            _LOGGER.error("Failed to create websocket session...")
+        self.stats["disconnects"] += 1
 
-        asyncio.create_task(self.connect(True))
+    async def supervise(self, url: str) -> None:
+        """Keep the websocket connected"""
+        while not self.stopping:
+            try:
+                await self.run(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                self.stats["failed_connects"] += 1
+                _LOGGER.warning("Failed to create websocket connection: %s", err)
 
-    async def connect(self, reconnect: bool = False) -> None:
-        """Initiate websocket connection"""
+            self.ws = None
 
-        await self.close()
+            # A bridge that accepts connections and then drops them right
+            # away keeps backing off instead of reconnecting every few seconds
+            if self.connected_at is not None:
+                uptime = time.monotonic() - self.connected_at
+                if uptime >= RECONNECT_STABLE_TIME:
+                    self.attempts = 0
+                self.connected_at = None
+
+            if self.stopping:
+                break
+
+            self.coordinator.async_set_websocket_state(False)
+
+            # Exponential backoff with jitter so that several instances
+            # do not hammer a rebooting bridge at the same time
+            delay = min(
+                RECONNECT_SLEEP * 2 ** self.attempts,
+                RECONNECT_MAX_SLEEP
+            )
+            delay = random.uniform(delay / 2, delay)
+            self.attempts += 1
 
-        if self.stopping:
+            _LOGGER.debug("Reconnecting to websocket in %.1fs", delay)
+
+            await asyncio.sleep(delay)
+
+    async def connect(self) -> None:
+        """Initiate websocket connection"""
+        if self.stopping or self.task:
             return
 
         url = f"ws://{self.host}:{WS_PORT}"
 
-        _LOGGER.debug(
-            "%s to websocket: %s",
-            reconnect and "Reconnecting" or "Connecting",
-            url
-        )
+        _LOGGER.debug("Connecting to websocket: %s", url)
 
-        if reconnect:
-            await asyncio.sleep(RECONNECT_SLEEP)
+        # Receiving and applying messages are split so that a slow
+        # handler never stalls reads from the socket
+        self.consumer = self.hass.async_create_background_task(
+            self.consume(),
+            f"{DOMAIN}_websocket_consumer_{self.host}"
+        )
 
-        self.task = asyncio.create_task(self.run(url))
+        self.task = self.hass.async_create_background_task(
+            self.supervise(url),
+            f"{DOMAIN}_websocket_{self.host}"
+        )
 
 
 class NexaApi:
@@ -252,14 +732,82 @@ class NexaApi:
         host: str,
         username: str,
         password: str,
-        legacy: bool
+        legacy: bool,
+        pooled: bool = False
     ) -> None:
         self.hass = hass
         self.host = host
         self.username = username
         self.password = password
         self.legacy = legacy
-        self._client = get_async_client(hass)
+        self.pooled = pooled
+        self.stats = {
+            "requests": 0,
+            "round_trips": 0,
+            "challenges": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "commands": 0,
+            "commands_sent": 0,
+            "commands_coalesced": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "requests_coalesced": 0,
+        }
+        self._commands: dict[tuple[str, str], NexaCommandSlot] = {}
+        self._cache: dict[str, tuple[float, Any]] = {}
+        self._pending_gets: dict[str, asyncio.Task] = {}
+
+        # The bridge serves one request at a time, so commands are sent
+        # before refreshes and polls instead of queueing behind them
+        self.scheduler = NexaRequestScheduler(REQUEST_CONCURRENCY)
+
+        # Each bridge gets its own pool so that commands and polls do not
+        # compete with the rest of Home Assistant for connections
+        if pooled:
+            self._client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    verify=False,
+                    limits=httpx.Limits(
+                        max_connections=REQUEST_CONCURRENCY,
+                        max_keepalive_connections=REQUEST_CONCURRENCY,
+                        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                    ),
+                ),
+                trust_env=False,
+            )
+        else:
+            self._client = get_async_client(hass)
+
+        # The auth state is kept so that the digest nonce is reused with an
+        # incrementing nonce count instead of a new challenge every request
+        if HTTP_BASIC_AUTH:
+            auth = httpx.BasicAuth(username, password)
+        else:
+            auth = httpx.DigestAuth(username, password)
+
+        self._auth = NexaAuth(auth, self.stats)
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self.pooled and not self._client.is_closed:
+            await self._client.aclose()
+
+    def create_trace(self) -> Callable[[str, Any], Awaitable[None]]:
+        """Creates a connection tracer for a request"""
+        connected = False
+
+        async def trace(event_name: str, info: Any) -> None:
+            nonlocal connected
+            if event_name == "connection.connect_tcp.complete":
+                connected = True
+                self.stats["connections_opened"] += 1
+            elif event_name == "http11.send_request_headers.started":
+                if not connected:
+                    self.stats["connections_reused"] += 1
+                connected = False
+
+        return trace
 
     async def handle_response(self, method: str, response: httpx.Response) -> Any:
         """Handles response"""
@@ -283,25 +831,84 @@ class NexaApi:
         self,
         method: str,
         endpoint: str,
-        body: Any = None
+        body: Any = None,
+        priority: int = PRIORITY_BULK,
+        cached: bool = True
     ) -> Response:
         """Performs a request"""
-        url = "http://%s/v1/%s" % (self.host, endpoint or "")
-
-        if HTTP_BASIC_AUTH:
-            auth = httpx.BasicAuth(self.username, self.password)
+        if method != "get":
+            return await self.send_request(method, endpoint, body, priority)
+
+        ttl = REQUEST_CACHE_TTL.get(endpoint)
+        if ttl and cached:
+            cached = self._cache.get(endpoint)
+            if cached and time.monotonic() - cached[0] < ttl:
+                self.stats["cache_hits"] += 1
+                return cached[1]
+            self.stats["cache_misses"] += 1
+
+        # Identical requests that are already on their way share a response
+        task = self._pending_gets.get(endpoint)
+        if task:
+            self.stats["requests_coalesced"] += 1
         else:
-            auth = httpx.DigestAuth(self.username, self.password)
+            task = self.hass.async_create_task(
+                self.send_request(method, endpoint, body, priority)
+            )
+            self._pending_gets[endpoint] = task
+            task.add_done_callback(partial(self.on_get_done, endpoint, ttl))
+
+        return await asyncio.shield(task)
+
+    def on_get_done(
+        self,
+        endpoint: str,
+        ttl: float | None,
+        task: asyncio.Task
+    ) -> None:
+        """Cache a shared response"""
+        # Checking the outcome also marks errors as retrieved in case every
+        # caller has gone away in the meantime
+        ok = not task.cancelled() and task.exception() is None
+
+        # Responses invalidated while in flight are not reused
+        if self._pending_gets.get(endpoint) is not task:
+            return
+
+        del self._pending_gets[endpoint]
+
+        if ttl and ok:
+            self._cache[endpoint] = (time.monotonic(), task.result())
+
+    def invalidate_node(self, node: str | int) -> None:
+        """Forget responses that include the state of a node"""
+        for endpoint in (f"nodes/{node}", "nodes"):
+            self._cache.pop(endpoint, None)
+            self._pending_gets.pop(endpoint, None)
+
+    async def send_request(
+        self,
+        method: str,
+        endpoint: str,
+        body: Any = None,
+        priority: int = PRIORITY_BULK
+    ) -> Response:
+        """Sends a request to the bridge"""
+        url = "http://%s/v1/%s" % (self.host, endpoint or "")
 
         _LOGGER.debug("%s %s: %s", str.upper(method), url, json.dumps(body))
 
-        response = await self._client.request(
-            method,
-            url,
-            auth=auth,
-            json=body,
-            timeout=CALL_TIMEOUT,
-        )
+        async with self.scheduler.slot(priority):
+            self.stats["requests"] += 1
+
+            response = await self._client.request(
+                method,
+                url,
+                auth=self._auth,
+                json=body,
+                timeout=CALL_TIMEOUT,
+                extensions={"trace": self.create_trace()},
+            )
 
         return await self.handle_response(method, response)
 
@@ -325,32 +932,49 @@ class NexaApi:
 
         return result
 
-    async def fetch_info(self) -> NexaInfoData:
+    async def fetch_info(self, cached: bool = True) -> NexaInfoData:
         """Get information about bridge"""
-        return await self.request("get", "info")
+        return await self.request("get", "info", None, PRIORITY_BULK, cached)
 
-    async def fetch_nodes(self, skip: bool) -> list[NexaNodeData]:
+    async def fetch_nodes(
+        self,
+        skip: bool,
+        known: Container[str] = ()
+    ) -> list[NexaNodeData]:
         """Get all configured nodes"""
-        if skip and self.legacy:
-            return []
-
         result = await self.request("get", "nodes")
         if FORCE_NODE_ENUM or self.legacy:
-            new_result = []
-            for r in result:
-                try:
-                    data = await self.fetch_node(r["id"])
-                    new_result.append(data)
-                except:
-                    _LOGGER.error("Failed to enum node data: %s", r["id"])
-
-            return new_result
+            semaphore = asyncio.Semaphore(NODE_ENUM_CONCURRENCY)
+
+            async def enum_node(node_id: str) -> NexaNodeData:
+                # Legacy values are kept up to date by the websocket, so
+                # only nodes that are not known yet have to be enumerated
+                node_key = normalize_node_id(node_id)
+                if skip and self.legacy and node_key in known:
+                    return {"id": node_id}
+
+                async with semaphore:
+                    try:
+                        return await self.fetch_node(node_id, PRIORITY_BULK)
+                    except Exception:
+                        _LOGGER.error("Failed to enum node data: %s", node_id)
+                        # The node is still listed, so it must not be
+                        # treated as removed from the bridge
+                        return {"id": node_id}
+
+            return await asyncio.gather(*[
+                enum_node(r["id"]) for r in result
+            ])
 
         return result
 
-    async def fetch_node(self, node: str) -> NexaNodeData:
+    async def fetch_node(
+        self,
+        node: str,
+        priority: int = PRIORITY_TARGETED
+    ) -> NexaNodeData:
         """Get a confiured node"""
-        return await self.request("get", f"nodes/{node}")
+        return await self.request("get", f"nodes/{node}", None, priority)
 
     async def fetch_energy(self) -> NexaEnergyData | NexaLegacyEnergyData:
         """Get energy stats"""
@@ -362,9 +986,10 @@ class NexaApi:
             return None
 
         try:
-            # Not all non-legacy firmware has this apparently
             return await self.request("get", "energy/nodes")
-        except Exception:
+        except NexaApiError:
+            # Not all non-legacy firmware has this apparently, but a bridge
+            # that can not be reached is still reported as a failure
             return None
 
     async def node_call(
@@ -374,13 +999,94 @@ class NexaApi:
         value: any
     ) -> NexaCallData:
         """Perform an action on a device"""
+        key = (normalize_node_id(node), capability)
+        self.stats["commands"] += 1
+
+        slot = self._commands.get(key)
+        if slot is None:
+            slot = self._commands[key] = NexaCommandSlot()
+
+        # Only the latest value matters, so a command that is still waiting
+        # is replaced and every superseded caller gets the same result
+        if slot.pending:
+            self.stats["commands_coalesced"] += 1
+            slot.pending.value = value
+            return await asyncio.shield(slot.pending.future)
+
+        command = NexaCommand(value)
+        slot.pending = command
+
+        if not slot.task:
+            slot.task = self.hass.async_create_task(
+                self.run_commands(node, capability, slot)
+            )
+
+        return await asyncio.shield(command.future)
+
+    async def run_commands(
+        self,
+        node: str,
+        capability: str,
+        slot: NexaCommandSlot
+    ) -> None:
+        """Send commands for a node capability one at a time"""
+        start = time.monotonic()
+        sent = 0
+
+        try:
+            while slot.pending:
+                command = slot.pending
+                slot.pending = None
+                sent += 1
+
+                try:
+                    result = await self.send_command(
+                        node,
+                        capability,
+                        command.value
+                    )
+                except Exception as err:
+                    command.set_exception(err)
+                else:
+                    command.set_result(result)
+        finally:
+            self._commands.pop((normalize_node_id(node), capability), None)
+
+        self.stats["commands_sent"] += sent
+
+        _LOGGER.debug(
+            "Command %s on %s settled in %.2fs (%d sent)",
+            capability,
+            node,
+            time.monotonic() - start,
+            sent
+        )
+
+    async def send_command(
+        self,
+        node: str,
+        capability: str,
+        value: any
+    ) -> NexaCallData:
+        """Send a command to a device"""
         if self.legacy and capability == "switchBinary":
             binaryValue = value and "turnOn" or "turnOff"
             body = {"cap": capability, "method": binaryValue}
         else:
             body = {"cap": capability, "value": value}
 
-        return await self.request("post", f"nodes/{node}/call", body)
+        # Reads started before the command finished may be outdated
+        self.invalidate_node(node)
+
+        try:
+            return await self.request(
+                "post",
+                f"nodes/{node}/call",
+                body,
+                PRIORITY_COMMAND
+            )
+        finally:
+            self.invalidate_node(node)
 
 
 class NexaInfo:
@@ -396,21 +1102,57 @@ class NexaInfo:
         self.model = data["systemType"]
         self.id = data["gwid"]
 
+    def as_dict(self) -> NexaInfoData:
+        """Get info in the same shape as the api"""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "systemType": self.model,
+            "gwid": self.id,
+        }
+
 
 class NexaNodeValue:
     """Model for node values"""
+    __slots__ = ("name", "value", "prev_value", "time", "raw_time")
+    name: str
+    value: NexaNodeValueType
+    prev_value: NexaNodeValueType
+    time: int
+    raw_time: str | None
 
     def __init__(
         self,
         name: str,
         value: NexaNodeValueType,
         prev_value: NexaNodeValueType,
-        time: str
+        time: int,
+        raw_time: str | None = None
     ):
         self.name = name
         self.value = value
         self.prev_value = prev_value
         self.time = time
+        self.raw_time = raw_time
+
+    def is_newer(self, raw_time: str) -> int | None:
+        """Parses given timestamp if it is newer than the current one"""
+        if raw_time == self.raw_time:
+            return None
+
+        time = parse_timestamp(raw_time)
+        return time if time > self.time else None
+
+    def update(
+        self,
+        value: NexaNodeValueType,
+        time: int,
+        raw_time: str | None
+    ) -> None:
+        """Update value and timestamp"""
+        self.value = value
+        self.time = time
+        self.raw_time = raw_time
 
 
 class NexaEnergy:
@@ -480,25 +1222,49 @@ class NexaEnergy:
 
 class NexaNode:
     """Model for a node"""
+    __slots__ = ("id", "name", "capabilities", "values", "custom_events")
     id: str | int
     name: str
     capabilities: list[str]
-    values: list[NexaNodeValue]
-    custom_events: list[str] = []
+    values: dict[str, NexaNodeValue]
+    custom_events: list[str]
 
     def __init__(self, node: NexaNodeData, legacy: bool):
         self.id = node["id"]
-        self.name = "name" in node and node["name"] or str(node["id"])
-        self.capabilities = node["capabilities"]
         self.values = values_from_events(node, legacy)
+        self.set_info(node, legacy)
+
+    def set_info(self, node: NexaNodeData, legacy: bool) -> set[str]:
+        """Set name, capabilities and events and get which ones changed"""
+        changed = set()
+        name = "name" in node and node["name"] or str(node["id"])
+        custom_events = []
 
         if "extraInfo" in node:
             if "customEvents" in node["extraInfo"]:
-                self.custom_events = [
+                custom_events = [
                     e["id"]
                     for e in node["extraInfo"]["customEvents"]
                 ]
 
+        if getattr(self, "name", None) != name:
+            changed.add("name")
+            self.name = name
+
+        if getattr(self, "custom_events", None) != custom_events:
+            changed.add("custom_events")
+            self.custom_events = custom_events
+
+        if getattr(self, "capabilities", None) != node["capabilities"]:
+            changed.add("capabilities")
+            self.capabilities = node["capabilities"]
+
+            # Values of capabilities that were added are picked up as well
+            for key, value in values_from_events(node, legacy).items():
+                self.values.setdefault(key, value)
+
+        return changed
+
     def get_event(
         self,
         name: str,
@@ -514,6 +1280,25 @@ class NexaNode:
 
         return None
 
+    def as_dict(self) -> NexaNodeData:
+        """Get node in the same shape as the api"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "capabilities": self.capabilities,
+            "extraInfo": {
+                "customEvents": [{"id": e} for e in self.custom_events]
+            },
+            "lastEvents": {
+                name: {
+                    "value": value.value,
+                    "prevValue": value.prev_value,
+                    "time": value.raw_time or format_timestamp(value.time),
+                }
+                for name, value in self.values.items()
+            },
+        }
+
     def get_binary_capabilities(self) -> list[str]:
         """Get all capabilities"""
         return list(filter(
@@ -528,42 +1313,43 @@ class NexaNode:
             self.capabilities
         ))
 
-    def set_values_from_node(self, node: NexaNode) -> None:
-        """Sets values from another node"""
-        for new_value in node.values:
-            new_time = new_value.time
-            for current_value in self.values:
-                current_time = current_value.time
-                if current_value.name == new_value.name:
-                    if is_newer_date(current_time, new_time):
-                        current_value.value = new_value.value
-                        _LOGGER.debug("[%s] Updating '%s' from node -> %s", self.id, current_value.name, new_value.value)
-                    else:
-                        _LOGGER.debug("[%s] Ignoring '%s' from node ", self.id, current_value.name)
-                    break
+    def set_values_from_events(
+        self,
+        events: dict[str, Any],
+        changes: set[tuple[str | int, str]]
+    ) -> None:
+        """Sets values from raw node events and collects what changed"""
+        for name, event in events.items():
+            current_value = self.values.get(name)
+            if current_value and "value" in event and "time" in event:
+                new_time = event["time"]
+                time = current_value.is_newer(new_time)
+                if time is not None:
+                    current_value.update(event["value"], time, new_time)
+                    changes.add((self.id, name))
 
     def set_value(
         self,
         name: str,
         new_value: NexaNodeValueType,
         new_time: str
-    ) -> None:
+    ) -> bool:
         """Set current state value"""
-        for value in self.values:
-            if value.name == name:
-                if is_newer_date(value.time, new_time):
-                    value.value = new_value
-                    value.time = new_time
-                    _LOGGER.debug("[%s] Updating '%s' from value -> %s", self.id, name, new_value)
-                else:
-                    _LOGGER.debug("[%s] Ignoring '%s' from value", self.id, name)
-                break
+        value = self.values.get(name)
+        if value:
+            time = value.is_newer(new_time)
+            if time is not None:
+                value.update(new_value, time, new_time)
+                _LOGGER.debug("[%s] Updating '%s' from value -> %s", self.id, name, new_value)
+                return True
+            _LOGGER.debug("[%s] Ignoring '%s' from value", self.id, name)
+        return False
 
     def get_value(self, name: str) -> NexaNodeValueType | None:
         """Get current state value"""
-        for value in self.values:
-            if value.name == name:
-                return value.value
+        value = self.values.get(name)
+        if value:
+            return value.value
         return None
 
     def is_switch(self) -> bool:
@@ -591,6 +1377,107 @@ class NexaNode:
         return "motor" in self.capabilities
 
 
+class NexaOptimisticValue:
+    """Model for a commanded value waiting for confirmation"""
+    __slots__ = (
+        "value",
+        "original",
+        "time",
+        "sequence",
+        "superseded",
+        "requested",
+        "sent",
+        "cancel"
+    )
+
+    def __init__(
+        self,
+        value: NexaNodeValueType,
+        original: NexaNodeValueType,
+        time: int
+    ):
+        self.value = value
+        self.original = original
+        self.time = time
+        self.sequence = 0
+        self.superseded: list[NexaNodeValueType] = []
+        self.requested = 0.0
+        self.sent: float | None = None
+        self.cancel: CALLBACK_TYPE = lambda: None
+
+
+class NexaPollEndpoint:
+    """Model for an endpoint polled at its own interval"""
+    name: str
+    interval: float
+    result: Any
+    last_fetched: float | None
+    last_failed: float | None
+    stale_since: float | None
+    failures: int
+    error: str | None
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Awaitable[Any]],
+        interval: float
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.result = None
+        self.last_fetched = None
+        self.last_failed = None
+        self.stale_since = None
+        self.failures = 0
+        self.error = None
+
+    def due_in(self, now: float) -> float:
+        """Get seconds until this endpoint should be fetched again"""
+        if self.last_failed is not None:
+            retry = min(self.interval, POLL_INTERVAL_DEGRADED)
+            return self.last_failed + retry - now
+        if self.last_fetched is None:
+            return 0
+        return self.last_fetched + self.interval - now
+
+    def set_result(self, result: Any, now: float) -> None:
+        """Store a successfully fetched result"""
+        self.result = result
+        self.last_fetched = now
+        self.last_failed = None
+        self.stale_since = None
+        self.error = None
+
+    def set_failed(self, now: float, error: Exception | None = None) -> None:
+        """Mark a fetch as failed so that it is retried later"""
+        self.last_failed = now
+        self.failures += 1
+        self.error = error and repr(error) or None
+        if self.stale_since is None:
+            self.stale_since = now
+
+    def is_stale(self) -> bool:
+        """If the current result is from before a failed fetch"""
+        return self.stale_since is not None
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Get the endpoint state"""
+        return {
+            "interval": self.interval,
+            "age": self.last_fetched and round(now - self.last_fetched),
+            "stale_for": self.stale_since and round(now - self.stale_since),
+            "failures": self.failures,
+            "error": self.error,
+        }
+
+    def invalidate(self) -> None:
+        """Fetch this endpoint on the next poll"""
+        self.last_fetched = None
+        self.last_failed = None
+
+
 class NexaData:
     """Model for polled data"""
 
@@ -603,100 +1490,886 @@ class NexaData:
         self.info = info
         self.nodes = nodes
         self.energy = energy
+        self.index = {normalize_node_id(node.id): node for node in nodes}
+
+    def get_node(self, node_id: str | int) -> NexaNode | None:
+        """Gets node by id from the index"""
+        return self.index.get(normalize_node_id(node_id))
+
+    def add_node(self, node: NexaNode) -> None:
+        """Adds a new node"""
+        self.nodes.append(node)
+        self.index[normalize_node_id(node.id)] = node
+
+    def remove_node(self, node_id: str | int) -> NexaNode | None:
+        """Removes a node"""
+        node = self.index.pop(normalize_node_id(node_id), None)
+        if node:
+            self.nodes.remove(node)
+        return node
 
 
 class NexaCoordinator(DataUpdateCoordinator):
     """Coordinates updates between entities"""
 
-    def __init__(self, hass: HomeAssistant, api: NexaApi, legacy: bool):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: NexaApi,
+        legacy: bool,
+        store: Store | None = None
+    ):
         super().__init__(
             hass,
             _LOGGER,
             name="Nexa Bridge X Coordinator",
             update_interval=timedelta(seconds=POLL_INTERVAL),
+            always_update=False,
         )
         self.api = api
         self.legacy = legacy
         self.hass = hass
+        self.store = store
         self.has_polled = False
-
-    def get_node_by_id(self, node_id: str) -> NexaNode | None:
+        self.restored = False
+        self.entities: dict[str, Entity] = {}
+        self.ws_connected = False
+        self.ws_has_connected = False
+        self.ws_last_event: float | None = None
+        self.ws_disconnected_at: float | None = None
+        self.early_messages = NexaMessageQueue(WS_QUEUE_SIZE)
+        self.stats = {
+            "writes": 0,
+            "suppressed_writes": 0,
+            "optimistic": 0,
+            "optimistic_confirmed": 0,
+            "optimistic_overridden": 0,
+            "optimistic_rolled_back": 0,
+            "optimistic_ignored": 0,
+            "command_latency_ms": None,
+            "command_latency_ms_max": None,
+            "confirm_latency_ms": None,
+            "confirm_latency_ms_max": None,
+        }
+        self._optimistic: dict[tuple[str, str], NexaOptimisticValue] = {}
+        self.endpoints = {
+            # Polls always go to the bridge so that a successful poll means
+            # the bridge is reachable
+            "info": NexaPollEndpoint(
+                "info",
+                lambda: self.api.fetch_info(False),
+                INFO_POLL_INTERVAL
+            ),
+            "nodes": NexaPollEndpoint(
+                "nodes",
+                lambda: self.api.fetch_nodes(
+                    False if FORCE_NODE_POLL else self.has_polled,
+                    self.data.index if self.data else ()
+                ),
+                POLL_INTERVAL
+            ),
+            "energy": NexaPollEndpoint(
+                "energy",
+                self.api.fetch_energy,
+                ENERGY_POLL_INTERVAL
+            ),
+        }
+
+        # Legacy bridges have no energy node stats to poll
+        if not legacy:
+            self.endpoints["energy_nodes"] = NexaPollEndpoint(
+                "energy_nodes",
+                self.api.fetch_energy_nodes,
+                ENERGY_POLL_INTERVAL
+            )
+        self._node_listeners: dict[
+            tuple[str, str | None],
+            list[CALLBACK_TYPE]
+        ] = {}
+        self._topology_listeners: list[
+            Callable[[list[NexaNode]], None]
+        ] = []
+        self._missing_nodes: dict[str, int] = {}
+
+    def get_node_by_id(self, node_id: str | int) -> NexaNode | None:
         """Gets node by id"""
-        if self.data and self.data.nodes:
-            for node in self.data.nodes:
-                if node.id == node_id:
-                    return node
+        if self.data:
+            return self.data.get_node(node_id)
         return None
 
-    def update_nodes_from_data(self, data: NexaData):
-        """Try to update nodes from given data"""
-        self.data.info = data.info
-        self.data.energy = data.energy
+    def get_nodes_interval(self) -> float:
+        """Get the node poll interval based on websocket health"""
+        if not self.ws_connected:
+            return POLL_INTERVAL_DEGRADED
+        if self.ws_last_event is None:
+            return POLL_INTERVAL
+        if time.monotonic() - self.ws_last_event > WS_SILENCE_THRESHOLD:
+            return POLL_INTERVAL
+        return POLL_INTERVAL_HEALTHY
+
+    def get_poll_interval(self) -> timedelta:
+        """Get the time until the next endpoint is due for polling"""
+        now = time.monotonic()
+        self.endpoints["nodes"].interval = self.get_nodes_interval()
+
+        interval = max(0, min(
+            endpoint.due_in(now)
+            for endpoint in self.endpoints.values()
+        ))
+
+        return timedelta(seconds=interval + random.uniform(0, POLL_JITTER))
+
+    def get_due_endpoints(self) -> list[NexaPollEndpoint]:
+        """Get endpoints that should be fetched in this poll"""
+        now = time.monotonic()
+        self.endpoints["nodes"].interval = self.get_nodes_interval()
+
+        # Endpoints due within the jitter window are fetched together
+        return [
+            endpoint
+            for endpoint in self.endpoints.values()
+            if endpoint.due_in(now) <= POLL_JITTER
+        ]
+
+    @callback
+    def async_set_websocket_state(self, connected: bool) -> None:
+        """Update the websocket health used for poll scheduling"""
+        if connected == self.ws_connected:
+            return
+
+        reconnected = connected and self.ws_has_connected
+        self.ws_connected = connected
+
+        if connected:
+            self.ws_has_connected = True
+            self.ws_last_event = time.monotonic()
+        else:
+            self.ws_disconnected_at = time.monotonic()
+
+        self.update_interval = self.get_poll_interval()
 
-        for node in data.nodes:
-            current_node = self.get_node_by_id(node.id)
-            if current_node:
-                current_node.set_values_from_node(node)
+        _LOGGER.debug(
+            "Websocket %s, polling every %ss",
+            connected and "connected" or "disconnected",
+            int(self.update_interval.total_seconds())
+        )
 
-    async def update_node_from_message(self, data: NexaWebsocketData) -> None:
-        """Try to update a node based on websocket message"""
         if not self.data:
-            _LOGGER.debug("Coordinator is not yet ready to update data...")
             return
 
+        if reconnected:
+            if self.has_fresh_nodes():
+                _LOGGER.debug("Nodes were fetched while disconnected")
+            else:
+                self.hass.async_create_task(self.async_resync())
+        elif not connected:
+            # Poll right away to catch up and to apply the new interval
+            self.endpoints["nodes"].invalidate()
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def has_fresh_nodes(self) -> bool:
+        """If the nodes were fetched right before the websocket reconnected"""
+        fetched = self.endpoints["nodes"].last_fetched
+        if fetched is None or self.ws_disconnected_at is None:
+            return False
+
+        # Anything older could have missed events from while disconnected
+        return (
+            fetched >= self.ws_disconnected_at
+            and time.monotonic() - fetched <= RECONNECT_SLEEP
+        )
+
+    async def async_resync(self) -> None:
+        """Fetch node states that were missed while disconnected"""
+        _LOGGER.debug("Resyncing nodes after websocket reconnect")
+
+        try:
+            async with async_timeout.timeout(POLL_TIMEOUT):
+                nodes = await self.api.fetch_nodes(False)
+        except (NexaApiError, httpx.HTTPError, asyncio.TimeoutError) as err:
+            _LOGGER.warning("Failed to resync nodes: %r", err)
+            self.endpoints["nodes"].invalidate()
+            return
+
+        self.endpoints["nodes"].set_result(nodes, time.monotonic())
+        self.async_update_node_listeners(self.merge_nodes(nodes))
+
+    @callback
+    def async_add_topology_listener(
+        self,
+        update_callback: Callable[[list[NexaNode]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for nodes being added to the bridge"""
+        self._topology_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self._topology_listeners:
+                self._topology_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_node_listener(
+        self,
+        node_id: str | int,
+        capability: str | None,
+        update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for updates to a node, or a single capability of a node"""
+        key = (normalize_node_id(node_id), capability)
+        self._node_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners = self._node_listeners.get(key)
+            if listeners and update_callback in listeners:
+                listeners.remove(update_callback)
+                if not listeners:
+                    del self._node_listeners[key]
+
+        return remove_listener
+
+    @callback
+    def async_update_node_listeners(
+        self,
+        changes: Iterable[tuple[str | int, str]]
+    ) -> None:
+        """Notify listeners of changed node capabilities once each"""
+        callbacks: dict[CALLBACK_TYPE, None] = {}
+        for node_id, capability in changes:
+            node_id = normalize_node_id(node_id)
+            for key in ((node_id, capability), (node_id, None)):
+                for update_callback in self._node_listeners.get(key, ()):
+                    callbacks[update_callback] = None
+
+        for update_callback in callbacks:
+            update_callback()
+
+    def merge_nodes(
+        self,
+        nodes: list[NexaNodeData],
+        partial: bool = False
+    ) -> set[tuple[str | int, str]]:
+        """Merge raw node data into current nodes and get what changed"""
+        start = time.perf_counter()
+        changes = set()
+
+        new_nodes = []
+        changed_nodes = []
+
+        for data in nodes:
+            node = self.get_node_by_id(data["id"])
+            if node:
+                if "lastEvents" in data:
+                    node.set_values_from_events(data["lastEvents"], changes)
+                if "capabilities" in data:
+                    changed = node.set_info(data, self.legacy)
+                    if "name" in changed:
+                        self.rename_node(node)
+                    if "custom_events" in changed:
+                        changes.add((node.id, "customEvent"))
+                    if "capabilities" in changed:
+                        changed_nodes.append(node)
+            elif "capabilities" in data:
+                new_nodes.append(NexaNode(data, self.legacy))
+
+        if changed_nodes:
+            self.update_capabilities(changed_nodes)
+
+        # A partial list says nothing about nodes that are not in it
+        if nodes and not partial:
+            self.update_topology(nodes, new_nodes)
+
+        # Restored entities stay unavailable until the bridge has confirmed
+        # their state, and are then written all at once
+        # Entries with only an id carry no state, while an empty list now
+        # always means the bridge has no nodes at all
+        confirmed = not nodes or any("lastEvents" in data for data in nodes)
+        if self.restored and not partial and confirmed:
+            self.restored = False
+            self.async_update_listeners()
+
+        _LOGGER.debug(
+            "Merged %d nodes in %.2fms with %d changes",
+            len(nodes),
+            (time.perf_counter() - start) * 1000,
+            len(changes)
+        )
+
+        return changes
+
+    def update_topology(
+        self,
+        nodes: list[NexaNodeData],
+        new_nodes: list[NexaNode]
+    ) -> None:
+        """Add new nodes and retire nodes that are gone from the bridge"""
+        for node in new_nodes:
+            _LOGGER.info("Found new node %s: %s", node.id, node.name)
+            self.data.add_node(node)
+
+        if new_nodes:
+            for update_callback in list(self._topology_listeners):
+                update_callback(new_nodes)
+
+        # A node has to be missing from consecutive polls before it is
+        # removed so that a single failed enumeration does not remove it
+        seen = set(normalize_node_id(data["id"]) for data in nodes)
+        for node_id in list(self.data.index):
+            if node_id in seen:
+                self._missing_nodes.pop(node_id, None)
+                continue
+
+            missing = self._missing_nodes.get(node_id, 0) + 1
+            self._missing_nodes[node_id] = missing
+            if missing >= NODE_REMOVE_AFTER:
+                self.remove_node(node_id)
+
+    def rename_node(self, node: NexaNode) -> None:
+        """Update the device of a renamed node"""
+        _LOGGER.info("Renaming node %s: %s", node.id, node.name)
+
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(identifiers={(DOMAIN, node.id)})
+        if device:
+            registry.async_update_device(
+                device.id,
+                name=f"{self.data.info.name} {node.name or node.id}"
+            )
+
+    def update_capabilities(self, nodes: list[NexaNode]) -> None:
+        """Add and retire entities of nodes with changed capabilities"""
+        for node in nodes:
+            _LOGGER.info("Capabilities changed for node %s", node.id)
+
+        # Platforms only add the entities that do not exist yet
+        for update_callback in list(self._topology_listeners):
+            update_callback(nodes)
+
+        registry = er.async_get(self.hass)
+        changed = {normalize_node_id(node.id): node for node in nodes}
+        for entity in list(self.entities.values()):
+            node = changed.get(normalize_node_id(entity.id))
+            if not node or entity.is_supported(node):
+                continue
+
+            _LOGGER.info("Retiring entity %s", entity.entity_id)
+
+            self.entities.pop(entity.unique_id, None)
+            if entity.registry_entry:
+                registry.async_remove(entity.entity_id)
+            elif entity.hass:
+                self.hass.async_create_task(entity.async_remove())
+
+    @callback
+    def claim_entities(self, entities: Iterable[Entity]) -> list[Entity]:
+        """Get the entities that have not been added yet"""
+        # Nodes with changed capabilities are passed to the platforms again,
+        # so entities that already exist have to be skipped
+        claimed = []
+        for entity in entities:
+            if entity.unique_id not in self.entities:
+                self.entities[entity.unique_id] = entity
+                claimed.append(entity)
+
+        return claimed
+
+    @callback
+    def release_entity(self, entity: Entity) -> None:
+        """Forget an entity that has been removed"""
+        if self.entities.get(entity.unique_id) is entity:
+            del self.entities[entity.unique_id]
+
+    def remove_node(self, node_id: str) -> None:
+        """Remove a node and its entities"""
+        node = self.data.remove_node(node_id)
+        self._missing_nodes.pop(node_id, None)
+
+        if node:
+            _LOGGER.info("Removing node %s: %s", node.id, node.name)
+
+            registry = dr.async_get(self.hass)
+            device = registry.async_get_device(identifiers={(DOMAIN, node.id)})
+            if device:
+                registry.async_remove_device(device.id)
+
+    def restore_cache(self, cache: dict[str, Any]) -> bool:
+        """Restore data from the topology cache"""
+        try:
+            self.data = NexaData(
+                NexaInfo(cache["info"]),
+                [NexaNode(n, self.legacy) for n in cache["nodes"]],
+                NexaEnergy(None, None, self.legacy)
+            )
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid topology cache: %r", err)
+            return False
+
+        self.restored = True
+
+        _LOGGER.debug("Restored %d nodes from cache", len(self.data.nodes))
+
+        return True
+
+    @callback
+    def get_cache(self) -> dict[str, Any]:
+        """Get data for the topology cache"""
+        return {
+            "info": self.data.info.as_dict(),
+            "nodes": [node.as_dict() for node in self.data.nodes],
+        }
+
+    @callback
+    def async_save_cache(self) -> None:
+        """Schedule saving of the topology cache"""
+        if self.store and self.data:
+            self.store.async_delay_save(self.get_cache, CACHE_SAVE_DELAY)
+
+    def merge_energy(self, energy: NexaEnergy) -> set[tuple[str, str]]:
+        """Replace energy data and get what changed"""
+        current = self.data.energy
+        self.data.energy = energy
+
+        return set(
+            (ENERGY_NODE_ID, attr)
+            for attr in ENERGY_ATTRS
+            if getattr(current, attr) != getattr(energy, attr)
+        )
+
+    async def update_nodes_from_messages(
+        self,
+        messages: list[NexaWebsocketData]
+    ) -> None:
+        """Apply websocket messages and notify affected entities once"""
+        self.ws_last_event = time.monotonic()
+
+        if not self.data:
+            # Replayed once the first data is in place, so that changes
+            # made while starting up are not lost
+            for data in messages:
+                self.early_messages.put(message_key(data, self.legacy), data)
+            return
+
+        changes = self.apply_messages(messages)
+        if changes:
+            self.async_update_node_listeners(changes)
+
+    def apply_messages(
+        self,
+        messages: list[NexaWebsocketData]
+    ) -> set[tuple[str | int, str]]:
+        """Apply websocket messages and get what changed"""
+        changes = set()
+        for data in messages:
+            try:
+                change = self.apply_message(data)
+            except Exception as e:
+                _LOGGER.warning("Failed to handle message: %s - %s", data, e)
+                continue
+
+            if change:
+                changes.add(change)
+
+        return changes
+
+    def apply_message(
+        self,
+        data: NexaWebsocketData
+    ) -> tuple[str | int, str] | None:
+        """Apply a websocket message to its node and get what changed"""
         cap_key = self.legacy and "name" or "capability"
         keys = (cap_key, "sourceNode", "value", "time")
         if not all(k in data for k in keys):
-            return
+            return None
 
         node_id: str = data["sourceNode"]
         if node_id and str(node_id) != "-1":
             value: NexaNodeValueType = data["value"]
-            time: NexaNodeValueType = data["time"]
+            timestamp: str = data["time"]
             cap: str = data[cap_key]
 
             #_LOGGER.debug("Coordinator update message: %s", data)
 
             node = self.get_node_by_id(node_id)
+
+            # Echoes of replaced commands would make the value jump back
+            if node and self.is_superseded_echo(node.id, cap, value):
+                self.stats["optimistic_ignored"] += 1
+                return None
+
             if node:
-                node.set_value(cap, value, time)
-                event = node.get_event(cap, value, time)
+                updated = node.set_value(cap, value, timestamp)
+                event = node.get_event(cap, value, timestamp)
                 if event:
                     self.hass.bus.async_fire(f"{DOMAIN}_custom_event", event)
 
-                #self.async_set_updated_data(self.data)
-                self.async_update_listeners()
+                if updated:
+                    self.confirm_optimistic(node.id, cap, value)
+                    return (node.id, cap)
 
-    async def _async_update_data(self) -> None:
-        """Update data by pulling in the background"""
+        return None
+
+    async def async_node_call(
+        self,
+        node_id: str | int,
+        capability: str,
+        value: NexaNodeValueType,
+        predicted: NexaNodeValueType | None = None
+    ) -> NexaCallData:
+        """Perform an action on a device and show the result right away"""
+        key = (normalize_node_id(node_id), capability)
+        sequence = self.set_optimistic(
+            node_id,
+            capability,
+            value if predicted is None else predicted
+        )
+
+        # Only the latest command decides the outcome, as older ones are
+        # either replaced by the api or followed by the latest one
         try:
-            timeout = POLL_TIMEOUT if self.has_polled else DISCOVERY_TIMEOUT
-            skip = False if FORCE_NODE_POLL else self.has_polled
-
-            async with async_timeout.timeout(timeout):
-                results = await asyncio.gather(*[
-                    self.api.fetch_info(),
-                    self.api.fetch_nodes(skip),
-                    self.api.fetch_energy(),
-                    self.api.fetch_energy_nodes(),
-                ])
-
-                (info, nodes, energy, energy_nodes) = results
-
-                data = NexaData(
-                    NexaInfo(info),
-                    list(map(lambda n: NexaNode(n, self.legacy), nodes)),
-                    NexaEnergy(energy, energy_nodes, self.legacy)
+            result = await self.api.node_call(node_id, capability, value)
+        except Exception:
+            if self.is_latest_optimistic(key, sequence):
+                # Earlier commands may have gone through, so the device
+                # could be somewhere between the original and this value
+                superseded = self._optimistic[key].superseded
+                self.rollback_optimistic(*key, bool(superseded))
+            raise
+
+        if self.is_latest_optimistic(key, sequence):
+            self.arm_optimistic(*key)
+
+        return result
+
+    def is_latest_optimistic(
+        self,
+        key: tuple[str, str],
+        sequence: int | None
+    ) -> bool:
+        """If a command is the latest one predicted for its capability"""
+        pending = self._optimistic.get(key)
+        return pending is not None and pending.sequence == sequence
+
+    def is_superseded_echo(
+        self,
+        node_id: str | int,
+        capability: str,
+        value: NexaNodeValueType
+    ) -> bool:
+        """If an event reports a command older than the latest prediction"""
+        if not self._optimistic:
+            return False
+
+        key = (normalize_node_id(node_id), capability)
+        pending = self._optimistic.get(key)
+
+        return (
+            pending is not None
+            and value != pending.value
+            and value in pending.superseded
+        )
+
+    @callback
+    def set_optimistic(
+        self,
+        node_id: str | int,
+        capability: str,
+        value: NexaNodeValueType
+    ) -> int | None:
+        """Show a commanded value until the bridge confirms it"""
+        node = self.data and self.get_node_by_id(node_id)
+        current = node and node.values.get(capability)
+        if not current:
+            return None
+
+        key = (normalize_node_id(node_id), capability)
+        pending = self._optimistic.get(key)
+
+        # The timestamp is left alone so any event from the bridge wins
+        if pending:
+            pending.cancel()
+            if pending.value not in pending.superseded:
+                pending.superseded.append(pending.value)
+            pending.value = value
+        else:
+            pending = NexaOptimisticValue(value, current.value, current.time)
+            self._optimistic[key] = pending
+
+        pending.sequence += 1
+        pending.requested = time.monotonic()
+        pending.sent = None
+
+        self.stats["optimistic"] += 1
+
+        if current.value != value:
+            current.value = value
+            self.async_update_node_listeners((key,))
+
+        return pending.sequence
+
+    @callback
+    def arm_optimistic(self, node_id: str | int, capability: str) -> None:
+        """Wait for confirmation of a command the bridge has accepted"""
+        key = (normalize_node_id(node_id), capability)
+        pending = self._optimistic.get(key)
+
+        # The confirmation may already have arrived before the response
+        if not pending:
+            return
+
+        # The timer starts only now, so time spent queued behind other
+        # requests never causes a rollback
+        pending.cancel()
+        pending.sent = time.monotonic()
+        pending.cancel = async_call_later(
+            self.hass,
+            OPTIMISTIC_TIMEOUT,
+            partial(self.async_optimistic_timeout, *key)
+        )
+
+        latency = round((pending.sent - pending.requested) * 1000)
+        self.stats["command_latency_ms"] = latency
+        self.stats["command_latency_ms_max"] = max(
+            latency,
+            self.stats["command_latency_ms_max"] or 0
+        )
+
+    @callback
+    def confirm_optimistic(
+        self,
+        node_id: str | int,
+        capability: str,
+        value: NexaNodeValueType
+    ) -> None:
+        """Settle a commanded value when the bridge reports it"""
+        if not self._optimistic:
+            return
+
+        key = (normalize_node_id(node_id), capability)
+        pending = self._optimistic.pop(key, None)
+        if not pending:
+            return
+
+        pending.cancel()
+
+        if value != pending.value:
+            self.stats["optimistic_overridden"] += 1
+            return
+
+        # Confirmations arriving before the response count as immediate
+        now = time.monotonic()
+        latency = round((now - (pending.sent or now)) * 1000)
+        self.stats["optimistic_confirmed"] += 1
+        self.stats["confirm_latency_ms"] = latency
+        self.stats["confirm_latency_ms_max"] = max(
+            latency,
+            self.stats["confirm_latency_ms_max"] or 0
+        )
+
+        _LOGGER.debug(
+            "[%s] Confirmed '%s' in %dms",
+            node_id,
+            capability,
+            latency
+        )
+
+    @callback
+    def async_optimistic_timeout(
+        self,
+        node_id: str,
+        capability: str,
+        _now: datetime
+    ) -> None:
+        """Give up on a command that the bridge never confirmed"""
+        self.rollback_optimistic(node_id, capability, True)
+
+    @callback
+    def rollback_optimistic(
+        self,
+        node_id: str,
+        capability: str,
+        refresh: bool = False
+    ) -> None:
+        """Restore the last known value of an unconfirmed command"""
+        pending = self._optimistic.pop((node_id, capability), None)
+        if not pending:
+            return
+
+        pending.cancel()
+
+        node = self.data and self.get_node_by_id(node_id)
+        current = node and node.values.get(capability)
+
+        # A poll may already have replaced the predicted value
+        if current and current.time == pending.time:
+            _LOGGER.debug("[%s] Rolling back '%s'", node_id, capability)
+
+            self.stats["optimistic_rolled_back"] += 1
+            current.value = pending.original
+            self.async_update_node_listeners(((node_id, capability),))
+
+        if refresh:
+            self.hass.async_create_task(self.async_refresh_nodes([node_id]))
+
+    async def async_refresh_nodes(
+        self,
+        node_ids: Iterable[str | int]
+    ) -> list[str | int]:
+        """Fetch and merge specific nodes and get the ones refreshed"""
+        async def fetch(node_id: str | int) -> NexaNodeData | None:
+            try:
+                async with async_timeout.timeout(POLL_TIMEOUT):
+                    return await self.api.fetch_node(node_id)
+            except (NexaApiError, httpx.HTTPError, asyncio.TimeoutError) as err:
+                _LOGGER.warning("Failed to refresh node %s: %r", node_id, err)
+                return None
+
+        results = await asyncio.gather(*[
+            fetch(node_id) for node_id in set(node_ids)
+        ])
+
+        nodes = [data for data in results if data]
+        if nodes and self.data:
+            self.async_update_node_listeners(self.merge_nodes(nodes, True))
+
+        return [data["id"] for data in nodes]
+
+    def create_energy(self) -> NexaEnergy:
+        """Create energy stats from the polled energy endpoints"""
+        energy_nodes = self.endpoints.get("energy_nodes")
+
+        return NexaEnergy(
+            self.endpoints["energy"].result,
+            energy_nodes and energy_nodes.result,
+            self.legacy
+        )
+
+    def merge_endpoints(self, fetched: set[str]) -> NexaData:
+        """Merge results of the fetched endpoints into the current data"""
+        endpoints = self.endpoints
+        changes = set()
+
+        if not self.data:
+            self.data = NexaData(
+                NexaInfo(endpoints["info"].result),
+                [
+                    NexaNode(n, self.legacy)
+                    for n in endpoints["nodes"].result
+                    if "capabilities" in n
+                ],
+                self.create_energy()
+            )
+            self.async_save_cache()
+
+            early = self.early_messages.drain()
+            if early:
+                _LOGGER.debug("Replaying %d early websocket messages", len(early))
+                self.apply_messages(early)
+
+            return self.data
+
+        if "info" in fetched:
+            self.data.info = NexaInfo(endpoints["info"].result)
+
+        if "nodes" in fetched:
+            changes |= self.merge_nodes(endpoints["nodes"].result)
+            self.async_save_cache()
+
+        # Energy is made from both endpoints, so the last known values are
+        # kept until neither of them is stale
+        energy_endpoints = [
+            endpoint
+            for name, endpoint in endpoints.items()
+            if name in ("energy", "energy_nodes")
+        ]
+
+        if any(e.name in fetched for e in energy_endpoints) and not any(
+            e.is_stale() for e in energy_endpoints
+        ):
+            changes |= self.merge_energy(self.create_energy())
+
+        # The data object is kept, so the coordinator does not broadcast to
+        # all entities and only the changed ones are notified
+        self.async_update_node_listeners(changes)
+
+        return self.data
+
+    async def fetch_endpoint(
+        self,
+        endpoint: NexaPollEndpoint,
+        timeout: float
+    ) -> bool:
+        """Fetch a single endpoint with its own timeout and retries"""
+        error = None
+
+        # The timeout is shared by all attempts so that retries never make
+        # a poll, or the first refresh during setup, take any longer
+        deadline = time.monotonic() + timeout
+
+        for attempt in range(POLL_RETRIES + 1):
+            if attempt:
+                if deadline - time.monotonic() <= POLL_RETRY_DELAY:
+                    break
+                await asyncio.sleep(POLL_RETRY_DELAY)
+
+            try:
+                async with async_timeout.timeout(deadline - time.monotonic()):
+                    result = await endpoint.fetch()
+
+                endpoint.set_result(result, time.monotonic())
+                return True
+            except NexaApiAuthorizationError:
+                raise
+            except (NexaApiError, httpx.HTTPError, asyncio.TimeoutError) as err:
+                error = err
+                _LOGGER.debug(
+                    "Failed to fetch '%s' (attempt %d): %r",
+                    endpoint.name,
+                    attempt + 1,
+                    err
                 )
 
-                self.has_polled = True
+        endpoint.set_failed(time.monotonic(), error)
+        return False
 
-                if self.data:
-                    self.update_nodes_from_data(data)
-                    return self.data
+    async def _async_update_data(self) -> None:
+        """Update data by pulling in the background"""
+        due = self.get_due_endpoints()
+        timeout = POLL_TIMEOUT if self.has_polled else DISCOVERY_TIMEOUT
 
-                return data
+        try:
+            results = await asyncio.gather(*[
+                self.fetch_endpoint(endpoint, timeout) for endpoint in due
+            ])
         except NexaApiAuthorizationError as err:
             raise ConfigEntryAuthFailed from err
-        except NexaApiError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}")
+        finally:
+            self.update_interval = self.get_poll_interval()
+
+        fetched = set(e.name for e, ok in zip(due, results) if ok)
+        failed = [e for e, ok in zip(due, results) if not ok]
+
+        if failed:
+            # Initial data can not be created without info and nodes
+            incomplete = not self.data and any(
+                e.name in ("info", "nodes") for e in failed
+            )
+
+            if incomplete or not fetched:
+                raise UpdateFailed(
+                    f"Error communicating with API: {failed[0].error}"
+                )
+
+            _LOGGER.warning(
+                "Using last known data for: %s",
+                ", ".join(e.name for e in failed)
+            )
+
+        data = self.merge_endpoints(fetched)
+
+        # Legacy bridges only enumerate new nodes after a full node poll
+        if "nodes" in fetched:
+            self.has_polled = True
+
+        return data
@@ -7,7 +7,7 @@ License: MIT
 """
 from __future__ import annotations
 from itertools import chain
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 from .const import (DOMAIN, ENERGY_ATTRS, LEGACY_ENERGY_ATTRS)
@@ -15,6 +15,7 @@ from .entities import (
     NexaSensorEntity,
     NexaEnergyEntity
 )
+from .nexa import NexaNode
 
 
 async def async_setup_entry(
@@ -25,10 +26,25 @@ async def async_setup_entry(
     """Set up all detected sensors"""
     coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
 
-    found_sensors = filter(
-        lambda node: node.is_sensor(),
-        coordinator.data.nodes
-    )
+    def create_sensor_entities(
+        nodes: list[NexaNode]
+    ) -> list[NexaSensorEntity]:
+        found_sensors = filter(
+            lambda node: node.is_sensor(),
+            nodes
+        )
+
+        return [
+            NexaSensorEntity(coordinator, node, name)
+            for node in found_sensors
+            for name in node.get_sensor_capabilities()
+        ]
+
+    @callback
+    def add_sensor_entities(nodes: list[NexaNode]) -> None:
+        entities = coordinator.claim_entities(create_sensor_entities(nodes))
+        if entities:
+            async_add_entities(entities)
 
     use_attrs = LEGACY_ENERGY_ATTRS if coordinator.legacy else ENERGY_ATTRS
     energy_entities = (
@@ -36,12 +52,14 @@ async def async_setup_entry(
         for attr in use_attrs
     )
 
-    sensor_entities = (
-        NexaSensorEntity(coordinator, node, name)
-        for node in found_sensors
-        for name in node.get_sensor_capabilities()
+    sensor_entities = coordinator.claim_entities(
+        create_sensor_entities(coordinator.data.nodes)
     )
 
     entities = chain(energy_entities, sensor_entities)
 
     async_add_entities(entities)
+
+    entry.async_on_unload(
+        coordinator.async_add_topology_listener(add_sensor_entities)
+    )